@@ -1,35 +1,166 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file
-from models import db, Material, Supplier, UsageLog, Sale, SaleItem, ReorderRequest
-from utils import get_low_stock, predict_depletion_days
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, send_file
+from models import db, begin_write, Material, Supplier, UsageLog, Sale, SaleItem, ReorderRequest
+from utils import get_low_stock, predict_depletion_days, simulate_stockout
+from reporting import init_reporting, reporting_session, supplier_report
+from events import stock_events, is_low, publish_stock_changes, publish_material_deleted
+from stocktake import CountSheetError, parse_count_sheet, reconcile, stock_changes
+from catalog import init_catalog, get_catalog
 from flask_migrate import Migrate
-from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import click
 import csv
 import io
 import os
-
-
-def create_app():
-    app = Flask(__name__)
+import sys
+
+
+def write_sales_csv(session, stream):
+    """
+    Writes every sale as one CSV row to `stream`.
+    Items and their materials are loaded in bulk rather than per sale.
+    """
+    sales_list = session.query(Sale).options(
+        selectinload(Sale.items).selectinload(SaleItem.material_ref)
+    ).order_by(Sale.date.desc()).all()
+    writer = csv.writer(stream)
+    writer.writerow(['Sale ID', 'Date', 'Total (₱)', 'Items'])
+    for sale in sales_list:
+        items = ', '.join(
+            [f"{i.material_ref.name} × {i.qty}" for i in sale.items])
+        writer.writerow([sale.id, sale.date.strftime(
+            "%Y-%m-%d %H:%M:%S"), f"₱{sale.total:.2f}", items])
+
+
+class CheckoutError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_client_timestamp(value):
+    """
+    Accepts an ISO-8601 string or epoch milliseconds from a terminal.
+    Returns a naive UTC datetime, or now when missing.
+    """
+    if value in (None, ''):
+        return datetime.utcnow()
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value / 1000.0)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def apply_cart(items, changes, date=None, client_key=None):
+    """
+    Records one cart as a Sale in the current session (no commit).
+    Stock is checked and decremented by one conditional UPDATE per line
+    whose RETURNING also supplies the name and price, so neither the
+    catalog nor Material objects are read while the write lock is held.
+    Updated rows are collected into `changes` as
+    {material_id: (material, was_low)} for publish_stock_changes().
+    Raises CheckoutError when the cart cannot be applied.
+    Returns:
+        (Sale, list of low-stock {'name', 'qty'} dicts)
+    """
+    if not isinstance(items, list) or len(items) == 0:
+        raise CheckoutError('No items provided')
+
+    date = date or datetime.utcnow()
+    sale = Sale(date=date, total=0, client_key=client_key)
+    db.session.add(sale)
+    db.session.flush()
+
+    low_stock = []
+    for item in items:
+        material_id = int(item.get('material_id') or item.get('id'))
+        qty = float(item.get('qty', 0))
+        if not qty > 0:
+            raise CheckoutError(f'Quantity for material ID {material_id} must be positive')
+
+        row = db.session.execute(
+            update(Material)
+            .where(Material.id == material_id, Material.quantity >= qty)
+            .values(quantity=Material.quantity - qty)
+            .returning(Material.id, Material.name, Material.unit, Material.quantity,
+                       Material.reorder_point, Material.price_per_unit)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            name = db.session.query(Material.name).filter_by(id=material_id).scalar()
+            if name is None:
+                raise CheckoutError(f'Material ID {material_id} not found', 404)
+            raise CheckoutError(f'Not enough stock for {name}')
+        material = SimpleNamespace(
+            id=row.id, name=row.name, unit=row.unit, quantity=float(row.quantity),
+            reorder_point=row.reorder_point or 0.0, price_per_unit=row.price_per_unit or 0.0)
+
+        price = float(material.price_per_unit)
+        subtotal = price * qty
+        was_low = changes[material_id][1] if material_id in changes \
+            else material.quantity + qty <= material.reorder_point
+        changes[material_id] = (material, was_low)
+
+        sale_item = SaleItem(
+            sale_id=sale.id,
+            material_id=material.id,
+            qty=qty,
+            price=price
+        )
+        db.session.add(sale_item)
+        db.session.add(UsageLog(material_id=material.id,
+                       used_quantity=qty, date=date))
+
+        if material.quantity <= material.reorder_point:
+            low_stock.append(
+                {'name': material.name, 'qty': material.quantity})
+
+        sale.total = (sale.total or 0) + subtotal
+
+    return sale, low_stock
+
+
+def create_app(test_config=None):
+    # static assets (pos.js, custom.css) live under templates/static
+    app = Flask(__name__, static_folder='templates/static')
 
     # ---------------- CONFIG ----------------
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventory.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # connections reserved for exports / analytics (read-only engine)
+    app.config['REPORTING_POOL_SIZE'] = int(
+        os.environ.get('REPORTING_POOL_SIZE', 5))
+    # max open /events/stock streams; each holds a waitress thread, so keep
+    # this well below the --threads value in the Procfile (16)
+    app.config['STOCK_STREAM_LIMIT'] = int(
+        os.environ.get('STOCK_STREAM_LIMIT', 8))
+    # seconds before the in-process material catalog is reloaded regardless
+    app.config['CATALOG_MAX_AGE'] = 60
+    if test_config:
+        app.config.update(test_config)
 
     db.init_app(app)
     Migrate(app, db)
+    init_reporting(app)
+    init_catalog(app, app.config['CATALOG_MAX_AGE'])
 
     # ---------------- INDEX ----------------
     @app.route('/')
     def index():
-        materials = Material.query.order_by(Material.name).all()
-        return render_template('index.html', materials=materials, low_count=len(get_low_stock()))
+        materials = get_catalog().all()
+        return render_template('index.html', materials=materials, low_count=get_catalog().low_count())
 
     # ---------------- INVENTORY ----------------
     @app.route('/inventory')
     def inventory():
-        materials = Material.query.order_by(Material.name).all()
-        return render_template('inventory.html', materials=materials, low_count=len(get_low_stock()))
+        materials = get_catalog().all()
+        return render_template('inventory.html', materials=materials, low_count=get_catalog().low_count())
 
     # ---------------- ADD / EDIT / DELETE MATERIAL ----------------
     @app.route('/materials/add', methods=['GET', 'POST'])
@@ -48,14 +179,17 @@ def create_app():
             )
             db.session.add(new_material)
             db.session.commit()
+            get_catalog().put([new_material])
+            publish_stock_changes([(new_material, None)])
             return redirect(url_for('inventory'))
-        return render_template('add_edit_material.html', suppliers=suppliers, material=None, low_count=len(get_low_stock()))
+        return render_template('add_edit_material.html', suppliers=suppliers, material=None, low_count=get_catalog().low_count())
 
     @app.route('/materials/<int:id>/edit', methods=['GET', 'POST'])
     def edit_material(id):
         material = Material.query.get_or_404(id)
         suppliers = Supplier.query.order_by(Supplier.name).all()
         if request.method == 'POST':
+            was_low = is_low(material)
             material.name = request.form['name']
             material.quantity = float(request.form.get('quantity', 0))
             material.unit = request.form.get('unit', material.unit)
@@ -67,16 +201,56 @@ def create_app():
             material.price_per_unit = float(
                 price_value) if price_value else 0.0
             db.session.commit()
+            get_catalog().put([material])
+            publish_stock_changes([(material, was_low)])
             return redirect(url_for('inventory'))
-        return render_template('add_edit_material.html', material=material, suppliers=suppliers, low_count=len(get_low_stock()))
+        return render_template('add_edit_material.html', material=material, suppliers=suppliers, low_count=get_catalog().low_count())
 
     @app.route('/materials/<int:id>/delete', methods=['POST'])
     def delete_material(id):
         material = Material.query.get_or_404(id)
+        was_low = is_low(material)
         db.session.delete(material)
         db.session.commit()
+        get_catalog().remove([id])
+        publish_material_deleted(id, was_low)
         return redirect(url_for('inventory'))
 
+    # ---------------- STOCKTAKE ----------------
+    @app.route('/stocktake', methods=['GET', 'POST'])
+    def stocktake():
+        results, errors, applied = None, None, False
+        if request.method == 'POST':
+            if request.is_json:
+                data = request.get_json(silent=True)
+                applied = not (isinstance(data, dict) and data.get('preview'))
+            else:
+                applied = request.form.get('action') == 'apply'
+            try:
+                results = reconcile(parse_count_sheet(request), apply=applied)
+            except CountSheetError as e:
+                db.session.rollback()
+                errors, applied = e.errors, False
+            if applied:
+                get_catalog().set_quantities({r['id']: r['counted'] for r in results})
+                publish_stock_changes(stock_changes(results))
+
+            if request.is_json:
+                if errors:
+                    return jsonify({'error': 'Invalid count sheet', 'errors': errors}), 400
+                return jsonify({
+                    'success': True,
+                    'applied': applied,
+                    'adjusted': sum(1 for r in results if r['variance'] != 0),
+                    'results': [{k: r[k] for k in ('id', 'name', 'book', 'counted', 'variance')} for r in results],
+                }), 200
+
+        materials = db.session.query(Material.id, Material.name, Material.unit,
+                                     Material.quantity).order_by(Material.name).all()
+        counted = {r['id']: r['counted'] for r in results or []}
+        return render_template('stocktake.html', materials=materials, results=results, counted=counted,
+                               errors=errors, applied=applied, low_count=get_catalog().low_count())
+
     # ---------------- ORDER MATERIAL ----------------
     @app.route('/materials/<int:material_id>/order', methods=['GET', 'POST'])
     def order_material(material_id):
@@ -87,7 +261,7 @@ def create_app():
             supplier_id = request.form.get('supplier_id') or None
             if reorder_qty <= 0:
                 return render_template('order_material.html', material=material, suppliers=suppliers,
-                                       error="Please enter a valid quantity.", low_count=len(get_low_stock()))
+                                       error="Please enter a valid quantity.", low_count=get_catalog().low_count())
             reorder_request = ReorderRequest(
                 material_id=material.id,
                 supplier_id=supplier_id,
@@ -97,20 +271,23 @@ def create_app():
             db.session.add(reorder_request)
             db.session.commit()
             return redirect(url_for('notifications'))
-        return render_template('order_material.html', material=material, suppliers=suppliers, low_count=len(get_low_stock()))
+        return render_template('order_material.html', material=material, suppliers=suppliers, low_count=get_catalog().low_count())
 
     @app.route('/reorder/<int:id>/update', methods=['POST'])
     def update_reorder_status(id):
         reorder = ReorderRequest.query.get_or_404(id)
         new_status = request.form.get('status')
         if new_status in ['Pending', 'Ordered', 'Received']:
-            reorder.status = new_status
+            reorder.set_status(new_status)
             db.session.commit()
         if reorder.status == 'Received':
             material = Material.query.get(reorder.material_id)
             if material:
+                was_low = is_low(material)
                 material.quantity += reorder.requested_qty
                 db.session.commit()
+                get_catalog().put([material])
+                publish_stock_changes([(material, was_low)])
         return redirect(url_for('notifications'))
 
     # ---------------- SUPPLIERS ----------------
@@ -126,7 +303,20 @@ def create_app():
             db.session.commit()
             return redirect(url_for('suppliers'))
         suppliers_list = Supplier.query.order_by(Supplier.name).all()
-        return render_template('suppliers.html', suppliers=suppliers_list, low_count=len(get_low_stock()))
+        return render_template('suppliers.html', suppliers=suppliers_list, low_count=get_catalog().low_count())
+
+    @app.route('/suppliers/report')
+    def supplier_report_view():
+        rows = supplier_report()
+        totals = {
+            'stock_value': sum(r['stock_value'] for r in rows),
+            'revenue': sum(r['revenue'] for r in rows),
+            'open_reorders': sum(r['open_reorders'] for r in rows),
+        }
+        if request.args.get('format') == 'json':
+            return jsonify({'suppliers': rows, 'totals': totals})
+        return render_template('supplier_report.html', rows=rows, totals=totals,
+                               low_count=get_catalog().low_count())
 
     @app.route('/suppliers/<int:id>/edit', methods=['GET', 'POST'])
     def edit_supplier(id):
@@ -136,38 +326,41 @@ def create_app():
             supplier.contact = request.form.get('contact')
             supplier.address = request.form.get('address')
             db.session.commit()
+            # supplier names are denormalised into the catalog
+            get_catalog().invalidate()
             return redirect(url_for('suppliers'))
-        return render_template('edit_supplier.html', supplier=supplier, low_count=len(get_low_stock()))
+        return render_template('edit_supplier.html', supplier=supplier, low_count=get_catalog().low_count())
 
     @app.route('/suppliers/<int:id>/delete', methods=['POST'])
     def delete_supplier(id):
         s = Supplier.query.get_or_404(id)
+        removed = [(m.id, is_low(m)) for m in s.materials]
         db.session.delete(s)
         db.session.commit()
+        get_catalog().remove([material_id for material_id, _ in removed])
+        for material_id, was_low in removed:
+            publish_material_deleted(material_id, was_low)
         return redirect(url_for('suppliers'))
 
     # ---------------- SALES ----------------
     @app.route('/sales')
     def sales():
-        sales_list = Sale.query.order_by(Sale.id.desc()).all()
-        return render_template('sales.html', sales=sales_list, low_count=len(get_low_stock()))
+        with reporting_session() as rs:
+            sales_list = rs.query(Sale).options(
+                selectinload(Sale.items).selectinload(SaleItem.material_ref)
+            ).order_by(Sale.id.desc()).all()
+            return render_template('sales.html', sales=sales_list, low_count=get_catalog().low_count())
 
     @app.route('/sales/<int:id>')
     def sale_view(id):
         sale = Sale.query.get_or_404(id)
-        return render_template('sale_view.html', sale=sale, low_count=len(get_low_stock()))
+        return render_template('sale_view.html', sale=sale, low_count=get_catalog().low_count())
 
     @app.route('/sales/export')
     def sales_export():
-        sales_list = Sale.query.order_by(Sale.date.desc()).all()
         output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Sale ID', 'Date', 'Total (₱)', 'Items'])
-        for sale in sales_list:
-            items = ', '.join(
-                [f"{i.material_ref.name} × {i.qty}" for i in sale.items])
-            writer.writerow([sale.id, sale.date.strftime(
-                "%Y-%m-%d %H:%M:%S"), f"₱{sale.total:.2f}", items])
+        with reporting_session() as rs:
+            write_sales_csv(rs, output)
         output.seek(0)
         return send_file(io.BytesIO(output.getvalue().encode('utf-8')),
                          mimetype='text/csv',
@@ -183,79 +376,143 @@ def create_app():
                 return jsonify({'error': 'Invalid or missing JSON data'}), 400
 
             items = data.get('items') or data.get('cart') or []
-            if not isinstance(items, list) or len(items) == 0:
-                return jsonify({'error': 'No items provided'}), 400
-
-            sale = Sale(date=datetime.utcnow(), total=0)
-            db.session.add(sale)
-            db.session.flush()
-
-            low_stock = []
-            for item in items:
-                material_id = int(item.get('material_id') or item.get('id'))
-                qty = float(item.get('qty', 0))
-
-                material = Material.query.get(material_id)
-                if not material:
-                    return jsonify({'error': f'Material ID {material_id} not found'}), 404
-                if material.quantity < qty:
-                    return jsonify({'error': f'Not enough stock for {material.name}'}), 400
-
-                price = float(material.price_per_unit or 0.0)
-                subtotal = price * qty
-                material.quantity -= qty
-
-                sale_item = SaleItem(
-                    sale_id=sale.id,
-                    material_id=material.id,
-                    qty=qty,
-                    price=price
-                )
-                db.session.add(sale_item)
-                db.session.add(UsageLog(material_id=material.id,
-                               used_quantity=qty, date=datetime.utcnow()))
-
-                if material.quantity <= material.reorder_point:
-                    low_stock.append(
-                        {'name': material.name, 'qty': material.quantity})
-
-                sale.total = (sale.total or 0) + subtotal
+            client_key = data.get('client_key') or None
 
-            db.session.commit()
+            def already_recorded():
+                existing = Sale.query.filter_by(client_key=client_key).first() if client_key else None
+                if existing:
+                    return jsonify({'success': True, 'message': 'Already recorded', 'sale_id': existing.id, 'low': []}), 200
+
+            response = already_recorded()
+            if response:
+                return response
+
+            changes = {}
+            try:
+                sale, low_stock = apply_cart(items, changes, client_key=client_key)
+                get_catalog().track(db.session, {mid: m.quantity for mid, (m, _) in changes.items()})
+                db.session.commit()
+            except CheckoutError as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), e.status
+            except IntegrityError:
+                # a retry of the same cart was recorded after our check
+                db.session.rollback()
+                response = already_recorded()
+                if response:
+                    return response
+                raise
+
+            publish_stock_changes(changes.values())
             return jsonify({'success': True, 'message': 'Checkout successful', 'sale_id': sale.id, 'low': low_stock}), 200
 
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/checkout/batch', methods=['POST'])
+    def checkout_batch():
+        """
+        Syncs carts queued by terminals while offline.
+        Body: {"carts": [{"client_key", "timestamp", "items"}, ...]}.
+        Carts are applied in order in one transaction (opened with the
+        write lock, see begin_write); each gets its own savepoint so a
+        failing cart doesn't undo the rest. Keys already recorded are
+        reported as duplicates and skipped.
+        """
+        data = request.get_json(force=True, silent=True)
+        carts = data.get('carts') if isinstance(data, dict) else None
+        if not isinstance(carts, list) or len(carts) == 0:
+            return jsonify({'error': 'No carts provided'}), 400
+        if any(not isinstance(c, dict) or not c.get('client_key') for c in carts):
+            return jsonify({'error': 'Every cart needs a client_key'}), 400
+
+        try:
+            keys = [str(c['client_key']) for c in carts]
+            begin_write(db.session)
+            seen = dict(db.session.query(Sale.client_key, Sale.id).filter(
+                Sale.client_key.in_(keys)).all())
+
+            results = []
+            changes = {}
+            for cart, key in zip(carts, keys):
+                if key in seen:
+                    results.append({'client_key': key, 'status': 'duplicate', 'sale_id': seen[key]})
+                    continue
+                savepoint = db.session.begin_nested()
+                # seed with earlier carts' records so stock carries forward
+                cart_changes = dict(changes)
+                try:
+                    sale, low_stock = apply_cart(
+                        cart.get('items'), cart_changes,
+                        date=parse_client_timestamp(cart.get('timestamp')), client_key=key)
+                    savepoint.commit()
+                except Exception as e:
+                    # any bad cart (even a malformed item) only fails itself
+                    savepoint.rollback()
+                    results.append({'client_key': key, 'status': 'error', 'error': str(e)})
+                    continue
+                changes = cart_changes
+                seen[key] = sale.id
+                results.append({'client_key': key, 'status': 'applied', 'sale_id': sale.id, 'low': low_stock})
+
+            get_catalog().track(db.session, {mid: m.quantity for mid, (m, _) in changes.items()})
+            db.session.commit()
+            publish_stock_changes(changes.values())
+            return jsonify({'success': True, 'results': results}), 200
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    # ---------------- STOCK EVENTS (SSE) ----------------
+    @app.route('/events/stock')
+    def stock_stream():
+        """
+        Server-sent stock and low_stock events for the POS and inventory
+        pages. Streams are per process; see StockEvents.
+        """
+        q = stock_events.subscribe(limit=app.config['STOCK_STREAM_LIMIT'])
+        if q is None:
+            response = jsonify({'error': 'Too many live stock streams open'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '30'
+            return response
+        response = Response(stock_events.stream(q),
+                            mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
     # ---------------- NOTIFICATIONS ----------------
     @app.route('/notifications')
     def notifications():
-        low = [m for m in Material.query.order_by(
-            Material.name).all() if m.quantity <= m.reorder_point]
-        low_with_prediction = []
-        for m in low:
-            days = predict_depletion_days(m)
-            reorder_requests = ReorderRequest.query.filter_by(
-                material_id=m.id).order_by(ReorderRequest.id.desc()).all()
-            low_with_prediction.append({
-                "id": m.id,
-                "name": m.name,
-                "qty": m.quantity,
-                "unit": m.unit,
-                "pred_days": days,
-                "reorder_requests": reorder_requests
-            })
-        return render_template('notifications.html', low=low_with_prediction, low_count=len(low_with_prediction))
+        with reporting_session() as rs:
+            low = get_low_stock(rs)
+            low.sort(key=lambda m: m.name)
+            low_with_prediction = []
+            for m in low:
+                days = predict_depletion_days(m, rs)
+                reorder_requests = rs.query(ReorderRequest).filter_by(
+                    material_id=m.id).order_by(ReorderRequest.id.desc()).all()
+                low_with_prediction.append({
+                    "id": m.id,
+                    "name": m.name,
+                    "qty": m.quantity,
+                    "unit": m.unit,
+                    "pred_days": days,
+                    "reorder_requests": reorder_requests
+                })
+            return render_template('notifications.html', low=low_with_prediction, low_count=len(low_with_prediction))
 
     # ---------------- SETTINGS & ABOUT ----------------
     @app.route('/settings')
     def settings():
-        return render_template('settings.html', low_count=len(get_low_stock()))
+        return render_template('settings.html', low_count=get_catalog().low_count())
 
     @app.route('/about')
     def about():
-        return render_template('about.html', low_count=len(get_low_stock()))
+        return render_template('about.html', low_count=get_catalog().low_count())
 
     # ---------------- ADMIN ----------------
     @app.route('/sales/clear', methods=['POST'])
@@ -275,6 +532,41 @@ def create_app():
         Material.query.delete()
         Supplier.query.delete()
         db.session.commit()
+        get_catalog().invalidate()
         return redirect(url_for('index'))
 
+    # ---------------- CLI ----------------
+    @app.cli.command('export-sales')
+    @click.argument('path', required=False)
+    def export_sales_command(path):
+        """Export all sales to CSV (stdout by default) over the read-only engine."""
+        with reporting_session() as rs:
+            if path:
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    write_sales_csv(rs, f)
+            else:
+                write_sales_csv(rs, sys.stdout)
+
+    @app.cli.command('simulate-stockout')
+    @click.option('--sims', default=2000, show_default=True, help='Trajectories per material.')
+    @click.option('--service-level', default=0.95, show_default=True)
+    @click.option('--lead-time', default=7, type=click.IntRange(min=1), show_default=True,
+                  help='Reorder lead time in days.')
+    @click.option('--seed', type=int, default=None)
+    def simulate_stockout_command(sims, service_level, lead_time, seed):
+        """Monte Carlo stock-out probability and reorder points for every material."""
+        horizons = (7, 14, 30)
+        with reporting_session() as rs:
+            results = simulate_stockout(horizons=horizons, n_sims=sims, service_level=service_level,
+                                        lead_time_days=lead_time, session=rs, seed=seed)
+            materials = rs.query(Material.id, Material.name, Material.quantity,
+                                 Material.reorder_point).order_by(Material.name).all()
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['Material', 'Qty', 'Reorder Point', 'Suggested Reorder Point']
+                        + [f'P(stock-out {h}d)' for h in horizons])
+        for m in materials:
+            r = results[m.id]
+            writer.writerow([m.name, m.quantity, m.reorder_point, r['reorder_point']]
+                            + [r['stockout_prob'][h] for h in horizons])
+
     return app
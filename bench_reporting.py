@@ -0,0 +1,131 @@
+# bench_reporting.py
+"""
+Checkout latency while a large sales export runs.
+
+Seeds a scratch SQLite database with many sales, then measures /checkout
+latency twice: once on an idle server and once while exporter processes
+(separate workers on the same database file) keep downloading
+/sales/export. --primary repeats the whole run with exports on the
+primary engine (REPORTING_READ_ONLY=False) as the A/B control.
+
+    python bench_reporting.py --sales 20000 --checkouts 200 --exporters 2
+    python bench_reporting.py --primary
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from app import create_app
+from models import db, Material, Sale, SaleItem
+
+
+def seed(app, n_sales, n_materials=50):
+    with app.app_context():
+        db.create_all()
+        materials = [Material(name=f"Material {i}", unit="pcs", quantity=1e9,
+                              reorder_point=0, price_per_unit=10.0)
+                     for i in range(n_materials)]
+        db.session.add_all(materials)
+        db.session.flush()
+        ids = [m.id for m in materials]
+        now = datetime.utcnow()
+        sales = [{"date": now, "total": 30.0} for _ in range(n_sales)]
+        db.session.execute(db.insert(Sale), sales)
+        sale_ids = db.session.scalars(db.select(Sale.id)).all()
+        db.session.execute(db.insert(SaleItem), [
+            {"sale_id": sid, "material_id": ids[(sid + k) % len(ids)], "qty": 1, "price": 10.0}
+            for sid in sale_ids for k in range(3)
+        ])
+        db.session.commit()
+        return ids
+
+
+def run_checkouts(app, material_ids, count):
+    client = app.test_client()
+    latencies = []
+    for i in range(count):
+        payload = {"items": [{"material_id": material_ids[i % len(material_ids)], "qty": 1}]}
+        start = time.perf_counter()
+        res = client.post("/checkout", json=payload)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if res.status_code != 200:
+            raise RuntimeError(f"checkout failed: {res.status_code} {res.get_data(as_text=True)}")
+    return latencies
+
+
+def export_loop(config, stop, done, failed):
+    client = create_app(config).test_client()
+    while not stop.is_set():
+        res = client.get("/sales/export")
+        res.get_data()
+        with done.get_lock():
+            done.value += 1
+        if res.status_code != 200:
+            with failed.get_lock():
+                failed.value += 1
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<32} mean {statistics.mean(latencies):7.2f} ms   "
+          f"p50 {statistics.median(latencies):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def run(label, read_only, args):
+    """Seeds a fresh database and measures checkout idle vs. while exporting."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "bench.db"),
+                  "REPORTING_READ_ONLY": read_only}
+        app = create_app(config)
+        material_ids = seed(app, args.sales)
+        print(f"[{label}] seeded {args.sales} sales")
+
+        summarize(f"[{label}] checkout (idle)", run_checkouts(app, material_ids, args.checkouts))
+
+        stop = multiprocessing.Event()
+        done = multiprocessing.Value("i", 0)
+        failed = multiprocessing.Value("i", 0)
+        workers = [multiprocessing.Process(target=export_loop, args=(config, stop, done, failed))
+                   for _ in range(args.exporters)]
+        for w in workers:
+            w.start()
+        try:
+            # let the exporters get into their first long read
+            while done.value == 0 and all(w.is_alive() for w in workers):
+                time.sleep(0.05)
+            latencies = run_checkouts(app, material_ids, args.checkouts)
+        finally:
+            stop.set()
+            for w in workers:
+                w.join()
+        summarize(f"[{label}] checkout (exporting)", latencies)
+        print(f"[{label}] exports completed: {done.value} (non-200: {failed.value})")
+
+        with app.app_context():
+            if app.extensions['reporting'] is not db.engine:
+                app.extensions['reporting'].dispose()
+            db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=20000)
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--exporters", type=int, default=2)
+    parser.add_argument("--primary", action="store_true",
+                        help="also run with exports on the primary engine, for comparison")
+    args = parser.parse_args()
+
+    run("read-only", True, args)
+    if args.primary:
+        run("primary", False, args)
+
+
+if __name__ == "__main__":
+    main()
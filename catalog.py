@@ -0,0 +1,243 @@
+import sqlite3
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from models import db, Material, Supplier
+
+
+class CatalogItem:
+    """
+    Compact read-only view of one material row.
+    Records are replaced, never mutated, so readers never see a half update.
+    """
+    __slots__ = ('id', 'name', 'unit', 'quantity', 'reorder_point',
+                 'price_per_unit', 'supplier_id', 'supplier_name')
+
+    def __init__(self, id, name, unit, quantity, reorder_point, price_per_unit,
+                 supplier_id=None, supplier_name=None):
+        self.id = id
+        self.name = name
+        self.unit = unit
+        self.quantity = quantity or 0.0
+        self.reorder_point = reorder_point or 0.0
+        self.price_per_unit = price_per_unit or 0.0
+        self.supplier_id = supplier_id
+        self.supplier_name = supplier_name
+
+    def replace(self, **changes):
+        values = {k: getattr(self, k) for k in self.__slots__}
+        values.update(changes)
+        return CatalogItem(**values)
+
+    def status(self):
+        return "LOW" if self.quantity <= self.reorder_point else "OK"
+
+    def __repr__(self):
+        return f"<CatalogItem {self.name}>"
+
+
+class Catalog:
+    """
+    In-process cache of the material catalog for the read-mostly paths
+    (POS page, inventory list, checkout price lookup).
+
+    Routes that write materials update it write-through after their commit.
+    On SQLite it also watches `PRAGMA data_version` on a dedicated connection:
+    the value changes whenever another connection (another worker process,
+    or this process's own pool) commits, and the next read reloads the
+    catalog with one Core query — no ORM objects are built either way.
+    Checkout registers its stock writes with track() so its own commits
+    are adopted without a reload (see _commit).
+    `max_age` seconds is a backstop: older catalogs are reloaded regardless.
+    """
+
+    def __init__(self, engine, max_age=60):
+        self._lock = threading.RLock()
+        # the watch connection is polled from request threads that must not
+        # wait behind a reload holding _lock
+        self._watch_lock = threading.Lock()
+        self._max_age = max_age
+        self._loaded_at = 0.0
+        self._items = None
+        self._ordered = None
+        self._low_count = None
+        self._version = None
+        self._watch = None
+        self._engine = engine
+        url = engine.url
+        if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+            self._watch = sqlite3.connect(url.database, check_same_thread=False)
+
+    # ---------------- loading ----------------
+    def data_version(self):
+        """SQLite `PRAGMA data_version` seen by this process (None elsewhere)."""
+        if self._watch is None:
+            return None
+        with self._watch_lock:
+            return _data_version(self._watch)
+
+    def _load(self):
+        # read the version first: a commit landing during the load only
+        # makes the next check reload again
+        version = self.data_version()
+        query = select(Material.id, Material.name, Material.unit, Material.quantity,
+                       Material.reorder_point, Material.price_per_unit,
+                       Material.supplier_id, Supplier.name).outerjoin(
+            Supplier, Material.supplier_id == Supplier.id)
+        with self._engine.connect() as conn:
+            items = {row[0]: CatalogItem(*row) for row in conn.execute(query)}
+        self._set(items)
+        self._version = version
+        self._loaded_at = time.monotonic()
+
+    def _set(self, items):
+        self._items = items
+        self._ordered = None
+        self._low_count = None
+
+    def _fresh(self):
+        with self._lock:
+            if (self._items is None
+                    or time.monotonic() - self._loaded_at > self._max_age
+                    or (self._watch is not None and self.data_version() != self._version)):
+                self._load()
+            return self._items
+
+    # ---------------- reads ----------------
+    def get(self, material_id):
+        return self._fresh().get(material_id)
+
+    def all(self):
+        """All materials ordered by name."""
+        with self._lock:
+            self._fresh()
+            if self._ordered is None:
+                self._ordered = sorted(self._items.values(), key=lambda m: m.name)
+            return self._ordered
+
+    def low_count(self):
+        with self._lock:
+            self._fresh()
+            if self._low_count is None:
+                self._low_count = sum(1 for m in self._items.values() if m.quantity <= m.reorder_point)
+            return self._low_count
+
+    # ---------------- write-through ----------------
+    def put(self, items):
+        """
+        Stores updated records (CatalogItem or Material objects).
+        Call after the commit that wrote them. The data_version is left
+        alone, so on SQLite the next read still reloads and picks up any
+        commit that landed after ours.
+        """
+        items = list(items)
+        with self._lock:
+            if self._items is None or not items:
+                return
+            for item in items:
+                if not isinstance(item, CatalogItem):
+                    supplier = getattr(item, 'supplier', None)
+                    item = CatalogItem(item.id, item.name, item.unit, item.quantity, item.reorder_point,
+                                       item.price_per_unit, item.supplier_id,
+                                       supplier.name if supplier else None)
+                self._items[item.id] = item
+            self._set(self._items)
+
+    def set_quantities(self, quantities):
+        """Write-through for stock-only changes: {material_id: new quantity}."""
+        with self._lock:
+            if self._items is None:
+                return
+            for material_id, quantity in quantities.items():
+                item = self._items.get(material_id)
+                if item is not None:
+                    self._items[material_id] = item.replace(quantity=quantity)
+            self._set(self._items)
+
+    def remove(self, material_ids):
+        with self._lock:
+            if self._items is None:
+                return
+            for material_id in material_ids:
+                self._items.pop(material_id, None)
+            self._set(self._items)
+
+    # ---------------- own commits ----------------
+    def track(self, session, quantities):
+        """
+        Registers stock levels ({material_id: new quantity}) written by the
+        open transaction of `session`; they are stored when it commits.
+        Call while that transaction holds the write lock (after a write).
+        """
+        if not quantities:
+            return
+        pending = session.info.get('catalog_writes')
+        if pending is None:
+            raw = session.connection().connection.dbapi_connection
+            pending = session.info['catalog_writes'] = {
+                'connection': raw,
+                'version': self.data_version(),
+                'connection_version': _data_version(raw) if self._watch is not None else None,
+                'quantities': {},
+            }
+        pending['quantities'].update(quantities)
+
+    def _commit(self, pending):
+        """
+        Stores tracked quantities after their commit and, when it's provable
+        that nothing else committed, adopts the new data_version so the
+        commit doesn't force a reload. `version` was read under the write
+        lock, so matching ours means the catalog was current then. A
+        connection's data_version ignores its own commits: if the committing
+        connection still reads the value it had before COMMIT (checked after
+        polling the watch), the watch saw exactly that one commit.
+        """
+        with self._lock:
+            if self._items is None:
+                return
+            if self._watch is not None:
+                if pending['version'] != self._version:
+                    return
+                version = self.data_version()
+                if _data_version(pending['connection']) != pending['connection_version']:
+                    return
+                self._version = version
+            self.set_quantities(pending['quantities'])
+
+    def invalidate(self):
+        with self._lock:
+            self._items = None
+            self._ordered = None
+            self._low_count = None
+
+
+def _data_version(dbapi_connection):
+    return dbapi_connection.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _commit_tracked(session):
+    pending = session.info.pop('catalog_writes', None)
+    if pending is not None and has_app_context() and 'catalog' in current_app.extensions:
+        current_app.extensions['catalog']._commit(pending)
+
+
+def _discard_tracked(session, transaction):
+    # rolled back (or never committed): the writes never happened
+    if transaction.parent is None:
+        session.info.pop('catalog_writes', None)
+
+
+def init_catalog(app, max_age=60):
+    with app.app_context():
+        app.extensions['catalog'] = Catalog(db.engine, max_age)
+    if not event.contains(Session, 'after_commit', _commit_tracked):
+        event.listen(Session, 'after_commit', _commit_tracked)
+        event.listen(Session, 'after_transaction_end', _discard_tracked)
+    return app.extensions['catalog']
+
+
+def get_catalog():
+    """The catalog of the current app."""
+    return current_app.extensions['catalog']
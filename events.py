@@ -0,0 +1,101 @@
+import json
+import queue
+import threading
+
+
+class StockEvents:
+    """
+    In-process broadcaster for stock changes.
+    Each connected terminal gets its own bounded queue; publish() never
+    blocks, so a slow client only misses events instead of stalling a sale.
+
+    Under waitress every open stream occupies one worker thread for as long
+    as the page stays open, so subscribe() refuses new streams past `limit`
+    to leave threads free for /checkout and page loads.
+
+    Events only reach subscribers in the publishing process. Live stock
+    updates therefore need the app served by one process, as the Procfile's
+    single waitress server does; with several worker processes (which the
+    material catalog otherwise supports) terminals only hear about sales
+    made through their own worker and pick up the rest on reload.
+    """
+
+    def __init__(self, maxsize=100):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._maxsize = maxsize
+
+    def subscribe(self, limit=None):
+        """Returns a new queue, or None when `limit` streams are already open."""
+        q = queue.Queue(maxsize=self._maxsize)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                pass
+
+    def stream(self, q, keepalive=15):
+        """
+        Generator of SSE messages for one subscribed queue; sends a comment
+        line every `keepalive` seconds so dead connections are noticed and
+        dropped (freeing their thread).
+        """
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield q.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(q)
+
+
+stock_events = StockEvents()
+
+
+def is_low(material):
+    return (material.quantity or 0) <= (material.reorder_point or 0)
+
+
+def publish_stock_changes(changes):
+    """
+    Publishes a `stock` event per material and a `low_stock` event for each
+    one that crossed its reorder point. Call after the commit.
+    `changes` is a list of (material, was_low) pairs; was_low is None for
+    new materials.
+    """
+    for material, was_low in changes:
+        low = is_low(material)
+        stock_events.publish('stock', {
+            "id": material.id,
+            "name": material.name,
+            "quantity": material.quantity,
+            "unit": material.unit,
+            "reorder_point": material.reorder_point,
+            "price_per_unit": material.price_per_unit,
+            "low": low,
+        })
+        if low != bool(was_low):
+            stock_events.publish('low_stock', {
+                "id": material.id, "name": material.name, "low": low})
+
+
+def publish_material_deleted(material_id, was_low):
+    stock_events.publish('stock', {"id": material_id, "deleted": True})
+    if was_low:
+        stock_events.publish('low_stock', {"id": material_id, "low": False})
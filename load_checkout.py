@@ -0,0 +1,183 @@
+# load_checkout.py
+"""
+Concurrent checkout load and correctness harness.
+
+Serves the app with waitress (as in the Procfile) on a scratch SQLite
+database, then fires carts at /checkout from several threads or processes
+over a small set of overlapping "popular" materials. Reports throughput,
+latency percentiles and lock-contention errors, then checks invariants:
+
+  * no material has negative stock
+  * each material's stock drop equals the sum of its SaleItem.qty
+  * each Sale.total equals the sum of qty * price of its items
+
+    python load_checkout.py --workers 8 --carts 100 --materials 5
+    python load_checkout.py --mode process --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from app import create_app
+from models import db, Material, Sale, SaleItem
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed(app, n_materials, stock):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Material(name=f"Popular {i}", unit="pcs", quantity=stock,
+                     reorder_point=stock / 10, price_per_unit=round(random.uniform(5, 500), 2))
+            for i in range(n_materials)
+        ])
+        db.session.commit()
+        return {m.id: m.quantity for m in Material.query.all()}
+
+
+def serve(app, port, threads):
+    from waitress import create_server
+    server = create_server(app, host="127.0.0.1", port=port, threads=threads)
+    # waitress has no clean cross-thread stop; the daemon thread ends with the process
+    threading.Thread(target=server.run, daemon=True).start()
+    return server
+
+
+def classify(status, body):
+    if status == 200:
+        return "ok"
+    error = (body or {}).get("error", "")
+    if "locked" in error or "busy" in error:
+        return "lock"
+    if "Not enough stock" in error:
+        return "out_of_stock"
+    return f"http_{status}"
+
+
+def run_worker(url, material_ids, carts, max_items, max_qty, seed_value):
+    """Sends `carts` checkouts one after another; returns [(outcome, seconds)]."""
+    rng = random.Random(seed_value)
+    results = []
+    for _ in range(carts):
+        items = [{"material_id": mid, "qty": rng.randint(1, max_qty)}
+                 for mid in rng.sample(material_ids, rng.randint(1, min(max_items, len(material_ids))))]
+        req = urllib.request.Request(url, data=json.dumps({"items": items}).encode(),
+                                     headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as res:
+                status, body = res.status, json.loads(res.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            try:
+                status, body = e.code, json.loads(e.read() or b"{}")
+            except ValueError:
+                status, body = e.code, {}
+        except OSError as e:
+            status, body = 0, {"error": str(e)}
+        results.append((classify(status, body), time.perf_counter() - start))
+    return results
+
+
+def check_invariants(app, initial_stock):
+    problems = []
+    with app.app_context():
+        sold = defaultdict(float)
+        for material_id, qty in db.session.query(SaleItem.material_id, db.func.sum(SaleItem.qty)).group_by(SaleItem.material_id):
+            sold[material_id] = qty
+
+        for m in Material.query.all():
+            if m.quantity < 0:
+                problems.append(f"{m.name}: negative stock {m.quantity}")
+            delta = initial_stock[m.id] - m.quantity
+            if abs(delta - sold[m.id]) > 1e-6:
+                problems.append(f"{m.name}: stock dropped {delta} but sold {sold[m.id]}")
+
+        item_totals = dict(db.session.query(SaleItem.sale_id, db.func.sum(SaleItem.qty * SaleItem.price))
+                           .group_by(SaleItem.sale_id).all())
+        for sale in Sale.query.all():
+            expected = item_totals.get(sale.id, 0.0)
+            if abs((sale.total or 0) - expected) > 1e-6:
+                problems.append(f"Sale {sale.id}: total {sale.total} != items {expected}")
+
+        sales = Sale.query.count()
+    return sales, problems
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent terminals")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--carts", type=int, default=50, help="carts per worker")
+    parser.add_argument("--materials", type=int, default=5, help="size of the popular SKU set")
+    parser.add_argument("--max-items", type=int, default=3)
+    parser.add_argument("--max-qty", type=int, default=5)
+    parser.add_argument("--stock", type=float, default=1000, help="starting quantity per material")
+    parser.add_argument("--server-threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "load.db")})
+        initial_stock = seed(app, args.materials, args.stock)
+        port = free_port()
+        serve(app, port, args.server_threads)
+        url = f"http://127.0.0.1:{port}/checkout"
+
+        pool_cls = ThreadPoolExecutor if args.mode == "thread" else ProcessPoolExecutor
+        material_ids = list(initial_stock)
+        start = time.perf_counter()
+        with pool_cls(max_workers=args.workers) as pool:
+            futures = [pool.submit(run_worker, url, material_ids, args.carts,
+                                   args.max_items, args.max_qty, seed_value)
+                       for seed_value in range(args.workers)]
+            results = [r for f in futures for r in f.result()]
+        elapsed = time.perf_counter() - start
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        print(f"{len(results)} carts from {args.workers} {args.mode} workers in {elapsed:.2f}s "
+              f"({len(results) / elapsed:.1f} carts/s, {outcomes['ok'] / elapsed:.1f} sales/s)")
+        print(f"latency ms: mean {statistics.mean(latencies):.1f}  p50 {percentile(latencies, 50):.1f}  "
+              f"p90 {percentile(latencies, 90):.1f}  p99 {percentile(latencies, 99):.1f}  max {latencies[-1]:.1f}")
+        print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items())))
+        print(f"lock-contention errors: {outcomes['lock']}")
+
+        sales, problems = check_invariants(app, initial_stock)
+        if sales != outcomes["ok"]:
+            problems.append(f"{outcomes['ok']} successful checkouts but {sales} sales recorded")
+        with app.app_context():
+            app.extensions['reporting'].dispose()
+            db.engine.dispose()
+
+    if problems:
+        print("INVARIANTS FAILED:")
+        for p in problems:
+            print("  " + p)
+        sys.exit(1)
+    print("invariants OK")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -3,6 +3,22 @@ from datetime import datetime
 
 db = SQLAlchemy()
 
+
+def begin_write(session):
+    """
+    Opens the session's transaction with the write lock already taken
+    (BEGIN IMMEDIATE on SQLite; a no-op elsewhere or once it has written).
+    pysqlite only starts a transaction before the first INSERT/UPDATE, so
+    without this a leading SAVEPOINT becomes the outer transaction and its
+    RELEASE commits on its own; reads made after it also see the rows the
+    following writes are based on.
+    """
+    connection = session.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
  
 # Supplier Model
  
@@ -86,6 +102,9 @@ class UsageLog(db.Model):
     )
     used_quantity = db.Column(db.Float, nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
+    # "usage" for sales, "adjustment" for stocktake variances
+    kind = db.Column(db.String(20), nullable=False,
+                     default="usage", server_default="usage")
 
     def __repr__(self):
         # be robust if material removed
@@ -100,6 +119,8 @@ class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     total = db.Column(db.Float, default=0)
+    # idempotency key generated by the POS terminal (offline sync)
+    client_key = db.Column(db.String(64), unique=True, index=True)
 
     # deleting a sale deletes its items
     items = db.relationship(
@@ -143,9 +164,19 @@ class ReorderRequest(db.Model):
     requested_qty = db.Column(db.Float, nullable=False)
     request_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(50), default="Pending")
+    # when the status moved on (request_date is the Pending time)
+    ordered_at = db.Column(db.DateTime)
+    received_at = db.Column(db.DateTime)
+
+    def set_status(self, status):
+        self.status = status
+        if status == "Ordered" and not self.ordered_at:
+            self.ordered_at = datetime.utcnow()
+        elif status == "Received" and not self.received_at:
+            self.received_at = datetime.utcnow()
 
     def mark_received(self):
-        self.status = "Received"
+        self.set_status("Received")
         db.session.commit()
 
     def __repr__(self):
@@ -0,0 +1,164 @@
+import threading
+from contextlib import contextmanager
+from flask import current_app, has_app_context
+from sqlalchemy import case, create_engine, event, func, select
+from sqlalchemy.orm import Session
+from models import db, Material, Supplier, SaleItem, ReorderRequest
+from catalog import get_catalog
+
+
+def _read_only_url(engine):
+    """
+    Builds the read-only URL for the primary database.
+    SQLite files are reopened through a `mode=ro` URI so a report can never
+    take a write lock; other backends reuse the primary URL as-is.
+    """
+    url = engine.url
+    if url.get_backend_name() != "sqlite":
+        return url.render_as_string(hide_password=False)
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    # WAL lets readers keep their snapshot while checkout commits
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def init_reporting(app):
+    """
+    Creates the read-only reporting engine next to the primary one, and
+    the report cache. Pool size comes from REPORTING_POOL_SIZE (default 5).
+    REPORTING_READ_ONLY=False keeps reports on the primary engine (used as
+    the control in bench_reporting.py).
+    """
+    app.config.setdefault('REPORTING_POOL_SIZE', 5)
+    app.config.setdefault('REPORTING_READ_ONLY', True)
+    app.extensions['report_cache'] = ReportCache()
+    if not event.contains(Session, 'after_commit', _invalidate_reports):
+        event.listen(Session, 'after_commit', _invalidate_reports)
+
+    with app.app_context():
+        primary = db.engine
+        if primary.url.get_backend_name() == "sqlite" and primary.url.database in (None, "", ":memory:"):
+            # an in-memory database only exists on the primary connection
+            app.extensions['reporting'] = primary
+            return primary
+        if primary.url.get_backend_name() == "sqlite":
+            event.listen(primary, "connect", _enable_wal)
+            # make sure the file (and WAL mode) exists before opening it read-only
+            with primary.connect():
+                pass
+        if not app.config['REPORTING_READ_ONLY']:
+            app.extensions['reporting'] = primary
+            return primary
+
+        engine = create_engine(
+            _read_only_url(primary),
+            pool_size=app.config['REPORTING_POOL_SIZE'],
+            max_overflow=0,
+        )
+
+    app.extensions['reporting'] = engine
+    return engine
+
+
+@contextmanager
+def reporting_session():
+    """
+    Yields an ORM session bound to the read-only reporting engine.
+    Use it for exports, analytics and other long reads so they never hold
+    a connection from the checkout pool. Must run inside an app context.
+    """
+    session = Session(bind=current_app.extensions['reporting'])
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def supplier_report_query():
+    """
+    Per-supplier metrics as one grouped SQL statement: material count,
+    stock value, sales revenue, open reorders and average Pending→Received
+    days. Each child table is aggregated in its own subquery before the
+    join so the sums don't multiply. Reorders without a supplier count
+    toward their material's supplier.
+    """
+    materials = select(
+        Material.supplier_id.label('supplier_id'),
+        func.count(Material.id).label('material_count'),
+        func.sum(Material.quantity * Material.price_per_unit).label('stock_value'),
+    ).group_by(Material.supplier_id).subquery()
+
+    sales = select(
+        Material.supplier_id.label('supplier_id'),
+        func.sum(SaleItem.qty * SaleItem.price).label('revenue'),
+    ).join(Material, SaleItem.material_id == Material.id).group_by(Material.supplier_id).subquery()
+
+    reorder_supplier = func.coalesce(ReorderRequest.supplier_id, Material.supplier_id)
+    reorders = select(
+        reorder_supplier.label('supplier_id'),
+        func.sum(case((ReorderRequest.status != 'Received', 1), else_=0)).label('open_reorders'),
+        func.avg(func.julianday(ReorderRequest.received_at)
+                 - func.julianday(ReorderRequest.request_date)).label('avg_fulfil_days'),
+    ).join(Material, ReorderRequest.material_id == Material.id).group_by(reorder_supplier).subquery()
+
+    return select(
+        Supplier.id,
+        Supplier.name,
+        Supplier.contact,
+        func.coalesce(materials.c.material_count, 0).label('material_count'),
+        func.coalesce(materials.c.stock_value, 0.0).label('stock_value'),
+        func.coalesce(sales.c.revenue, 0.0).label('revenue'),
+        func.coalesce(reorders.c.open_reorders, 0).label('open_reorders'),
+        reorders.c.avg_fulfil_days,
+    ).outerjoin(materials, materials.c.supplier_id == Supplier.id) \
+        .outerjoin(sales, sales.c.supplier_id == Supplier.id) \
+        .outerjoin(reorders, reorders.c.supplier_id == Supplier.id) \
+        .order_by(Supplier.name)
+
+
+class ReportCache:
+    """
+    Caches computed reports until the next write. Commits in this process
+    clear it (see init_reporting); writes from other processes are caught
+    by the SQLite data_version the material catalog already watches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, name, version, compute):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries[name] = (version, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _invalidate_reports(session):
+    if has_app_context() and 'report_cache' in current_app.extensions:
+        current_app.extensions['report_cache'].invalidate()
+
+
+def supplier_report():
+    """
+    Returns the supplier report rows, from cache unless something was
+    written since they were computed. Must run inside an app context.
+    """
+    def compute():
+        with reporting_session() as rs:
+            return [dict(row._mapping) for row in rs.execute(supplier_report_query())]
+
+    cache = current_app.extensions['report_cache']
+    return cache.get('suppliers', get_catalog().data_version(), compute)
@@ -0,0 +1,147 @@
+import csv
+import io
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import insert, update
+from models import db, begin_write, Material, UsageLog
+
+
+class CountSheetError(Exception):
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _to_float(value):
+    if value is None or str(value).strip() == '':
+        return None
+    return float(value)
+
+
+def parse_count_sheet(req):
+    """
+    Reads a count sheet from a JSON body, an uploaded CSV file or the
+    stocktake form. Returns a list of {'material_id' | 'name', 'counted'}.
+    JSON: {"counts": [{"material_id": 1, "counted": 40}, ...]}
+    CSV: header with material_id or name, plus counted (or count / quantity).
+    Form: one `count-<material_id>` field per material; blanks are skipped.
+    """
+    if req.is_json:
+        data = req.get_json(silent=True) or {}
+        rows = data.get('counts') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise CountSheetError(['Expected a "counts" list'])
+        return rows
+
+    upload = req.files.get('sheet')
+    if upload and upload.filename:
+        text = io.TextIOWrapper(upload.stream, encoding='utf-8-sig')
+        rows = []
+        for row in csv.DictReader(text):
+            row = {(k or '').strip().lower(): v for k, v in row.items()}
+            rows.append({
+                'material_id': row.get('material_id') or row.get('id'),
+                'name': row.get('name') or row.get('material'),
+                'counted': row.get('counted', row.get('count', row.get('quantity'))),
+            })
+        return rows
+
+    return [{'material_id': key[len('count-'):], 'counted': value}
+            for key, value in req.form.items()
+            if key.startswith('count-') and value.strip() != '']
+
+
+def reconcile(rows, apply=False):
+    """
+    Computes variances for a count sheet against current stock in one query.
+    With apply=True the book quantities are read under the write lock and
+    every adjustment is written in that same transaction, so no sale can
+    land in between: one executemany UPDATE for quantities and one INSERT
+    of 'adjustment' UsageLog rows (used_quantity = book - counted, so
+    shrinkage is positive).
+    Raises CountSheetError if any row is invalid or a material is listed
+    more than once; nothing is applied then.
+    Returns:
+        list of dicts (id, name, unit, book, counted, variance)
+    """
+    errors = []
+    counted_by_id, counted_by_name = {}, {}
+    row_by_id, row_by_name = {}, {}
+    for n, row in enumerate(rows, start=1):
+        try:
+            counted = _to_float(row.get('counted'))
+            material_id = row.get('material_id')
+            if counted is None:
+                raise ValueError('missing count')
+            if counted < 0:
+                raise ValueError('count cannot be negative')
+            if material_id not in (None, ''):
+                material_id = int(material_id)
+                if material_id in row_by_id:
+                    raise ValueError(f'material ID {material_id} already counted in row {row_by_id[material_id]}')
+                counted_by_id[material_id], row_by_id[material_id] = counted, n
+            elif row.get('name'):
+                name = row['name'].strip()
+                if name in row_by_name:
+                    raise ValueError(f'"{name}" already counted in row {row_by_name[name]}')
+                counted_by_name[name], row_by_name[name] = counted, n
+            else:
+                raise ValueError('missing material_id or name')
+        except (TypeError, ValueError, AttributeError) as e:
+            errors.append(f'Row {n}: {e}')
+
+    if apply and not errors:
+        begin_write(db.session)
+    columns = (Material.id, Material.name, Material.unit, Material.quantity,
+               Material.reorder_point, Material.price_per_unit)
+    query = db.session.query(*columns)
+    if counted_by_id and counted_by_name:
+        query = query.filter(Material.id.in_(counted_by_id) | Material.name.in_(counted_by_name))
+    elif counted_by_id:
+        query = query.filter(Material.id.in_(counted_by_id))
+    elif counted_by_name:
+        query = query.filter(Material.name.in_(counted_by_name))
+    elif not errors:
+        errors.append('Count sheet is empty')
+    current = query.all() if counted_by_id or counted_by_name else []
+
+    found_ids = {m.id for m in current}
+    found_names = {m.name for m in current}
+    errors += [f'Material ID {i} not found' for i in counted_by_id if i not in found_ids]
+    errors += [f'Material "{name}" not found' for name in counted_by_name if name not in found_names]
+    errors += [f'Row {row_by_name[m.name]}: "{m.name}" already counted in row {row_by_id[m.id]}'
+               for m in current if m.id in row_by_id and m.name in row_by_name]
+    if errors:
+        raise CountSheetError(errors)
+
+    results = []
+    for m in sorted(current, key=lambda m: m.name):
+        counted = counted_by_id.get(m.id, counted_by_name.get(m.name))
+        book = m.quantity or 0.0
+        results.append({'id': m.id, 'name': m.name, 'unit': m.unit, 'book': book,
+                        'counted': counted, 'variance': round(counted - book, 6),
+                        'reorder_point': m.reorder_point, 'price_per_unit': m.price_per_unit})
+
+    if apply:
+        adjusted = [r for r in results if r['variance'] != 0]
+        if adjusted:
+            now = datetime.utcnow()
+            db.session.execute(update(Material), [
+                {'id': r['id'], 'quantity': r['counted']} for r in adjusted])
+            db.session.execute(insert(UsageLog), [
+                {'material_id': r['id'], 'used_quantity': -r['variance'],
+                 'date': now, 'kind': 'adjustment'} for r in adjusted])
+        db.session.commit()
+
+    return results
+
+
+def stock_changes(results):
+    """
+    (material, was_low) pairs for publish_stock_changes() built from the
+    reconcile() rows, without loading ORM objects.
+    """
+    return [(SimpleNamespace(id=r['id'], name=r['name'], unit=r['unit'], quantity=r['counted'],
+                             reorder_point=r['reorder_point'], price_per_unit=r['price_per_unit']),
+             (r['book'] or 0) <= (r['reorder_point'] or 0))
+            for r in results if r['variance'] != 0]
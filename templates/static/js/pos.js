@@ -1,7 +1,114 @@
+// ---------------- OFFLINE QUEUE ----------------
+// sales made while the site connection is down are kept in localStorage
+// and synced in one request to /checkout/batch when it comes back
+const PENDING_KEY = "pos.pendingCarts";
+// carts the server rejected; kept for review instead of being dropped
+const FAILED_KEY = "pos.failedCarts";
+
+function newClientKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + "-" + Math.random().toString(36).slice(2, 12);
+}
+
+function loadPendingCarts() {
+    try { return JSON.parse(localStorage.getItem(PENDING_KEY)) || []; } catch (e) { return []; }
+}
+
+function savePendingCarts(carts) {
+    localStorage.setItem(PENDING_KEY, JSON.stringify(carts));
+}
+
+function loadFailedCarts() {
+    try { return JSON.parse(localStorage.getItem(FAILED_KEY)) || []; } catch (e) { return []; }
+}
+
+function saveFailedCarts(carts) {
+    localStorage.setItem(FAILED_KEY, JSON.stringify(carts));
+    renderFailedCarts();
+}
+
+// show rejected offline sales in #offline-failed (POS page) for review
+function renderFailedCarts() {
+    const box = document.getElementById("offline-failed");
+    if (!box) return;
+    const carts = loadFailedCarts();
+    box.classList.toggle("d-none", carts.length === 0);
+    const list = box.querySelector(".js-failed-list");
+    list.innerHTML = "";
+    carts.forEach(c => {
+        const items = c.items.map(i => `#${i.material_id} × ${i.qty}`).join(", ");
+        const li = document.createElement("li");
+        li.textContent = `${new Date(c.timestamp).toLocaleString()} — ${items} — ${c.error}`;
+        list.appendChild(li);
+    });
+}
+
+function retryFailedCarts() {
+    const failed = loadFailedCarts();
+    if (!failed.length) return;
+    const carts = loadPendingCarts();
+    failed.forEach(({ error, ...cart }) => carts.push(cart));
+    savePendingCarts(carts);
+    saveFailedCarts([]);
+    syncPendingCarts();
+}
+
+function discardFailedCarts() {
+    if (!confirm("Discard the rejected offline sales? They will not be recorded anywhere.")) return;
+    saveFailedCarts([]);
+}
+
+function queueOfflineSale(items, clientKey) {
+    const carts = loadPendingCarts();
+    carts.push({ client_key: clientKey || newClientKey(), timestamp: new Date().toISOString(), items: items });
+    savePendingCarts(carts);
+    return carts.length;
+}
+
+let syncing = false;
+
+async function syncPendingCarts() {
+    const carts = loadPendingCarts();
+    if (syncing || !carts.length) return;
+    syncing = true;
+    try {
+        const res = await fetch("/checkout/batch", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ carts: carts })
+        });
+        if (!res.ok) return;
+        const data = await res.json();
+        const done = new Set(data.results.map(r => r.client_key));
+        const errors = new Map(data.results.filter(r => r.status === "error").map(r => [r.client_key, r.error]));
+        const pending = loadPendingCarts();
+        // rejected carts move to the review list; anything queued while
+        // this request was in flight stays pending
+        if (errors.size) {
+            saveFailedCarts(loadFailedCarts().concat(
+                pending.filter(c => errors.has(c.client_key)).map(c => ({ ...c, error: errors.get(c.client_key) }))));
+            alert(`⚠️ ${errors.size} offline sale(s) could not be recorded. Review them on the POS page.`);
+        }
+        savePendingCarts(pending.filter(c => !done.has(c.client_key)));
+    } catch (err) {
+        console.warn("Offline sales sync failed, will retry:", err);
+    } finally {
+        syncing = false;
+    }
+}
+
+window.addEventListener("online", syncPendingCarts);
+document.addEventListener("DOMContentLoaded", () => {
+    renderFailedCarts();
+    syncPendingCarts();
+});
+setInterval(() => { if (navigator.onLine) syncPendingCarts(); }, 60000);
+
 // call this when user clicks confirm/checkout
 async function doCheckout(items) {
     // items must be an array of objects: { material_id: "1", qty: 2 }
-    const payload = { items: items };
+    const clientKey = newClientKey();
+    const payload = { items: items, client_key: clientKey };
 
     console.log("Sending payload to /checkout:", payload);
 
@@ -28,14 +135,64 @@ async function doCheckout(items) {
 
         // success
         alert("✅ Checkout successful");
-        // if server returned sale_id, redirect
+        // if server returned sale_id, redirect; otherwise the stock
+        // stream below updates the rows in place
         if (data && data.sale_id) {
             window.location.href = `/sales/${data.sale_id}`;
-        } else {
-            location.reload();
         }
     } catch (err) {
         console.error("Network/fetch error:", err);
-        alert("⚠️ Network error: " + err.message);
+        const queued = queueOfflineSale(items, clientKey);
+        alert(`⚠️ Offline: sale saved on this terminal and will sync when the connection returns (${queued} pending).`);
+    }
+}
+
+// live stock updates pushed from /events/stock (server-sent events)
+function applyStockEvent(m) {
+    document.querySelectorAll(`tr[data-material-id="${m.id}"]`).forEach(row => {
+        if (m.deleted) {
+            row.remove();
+            return;
+        }
+        const qtyCell = row.querySelector(".js-qty");
+        if (qtyCell) qtyCell.textContent = m.quantity;
+        row.querySelectorAll(".js-low").forEach(el => el.classList.toggle("d-none", !m.low));
+        row.querySelectorAll(".js-ok").forEach(el => el.classList.toggle("d-none", m.low));
+    });
+
+    const option = document.querySelector(`#material-select option[value="${m.id}"]`);
+    if (option) {
+        if (m.deleted) {
+            option.remove();
+        } else {
+            option.setAttribute("data-qty", m.quantity);
+            option.setAttribute("data-price", m.price_per_unit || 0);
+        }
     }
 }
+
+function applyLowStockEvent(m) {
+    const badge = document.getElementById("low-count");
+    if (!badge) return;
+    const count = Math.max(0, (parseInt(badge.textContent) || 0) + (m.low ? 1 : -1));
+    badge.textContent = count;
+    badge.classList.toggle("d-none", count === 0);
+}
+
+// each open stream holds a server thread, so only pages that show live
+// stock (marked with data-stock-stream) subscribe
+function openStockStream() {
+    const source = new EventSource("/events/stock");
+    source.addEventListener("stock", e => applyStockEvent(JSON.parse(e.data)));
+    source.addEventListener("low_stock", e => applyLowStockEvent(JSON.parse(e.data)));
+    // EventSource retries network drops itself but gives up on an HTTP
+    // error (e.g. 503 when the server's stream limit is reached)
+    source.addEventListener("error", () => {
+        if (source.readyState === EventSource.CLOSED) setTimeout(openStockStream, 30000);
+    });
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    if (!window.EventSource || !document.querySelector("[data-stock-stream]")) return;
+    openStockStream();
+});
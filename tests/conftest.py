@@ -0,0 +1,15 @@
+import pytest
+
+from app import create_app
+from models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.db")})
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        app.extensions['reporting'].dispose()
+        db.engine.dispose()
@@ -0,0 +1,55 @@
+import sqlite3
+
+from catalog import Catalog, get_catalog
+from models import db, Material
+
+
+def add_materials(app, *materials):
+    with app.app_context():
+        db.session.add_all([Material(name=name, quantity=qty, reorder_point=rp, unit="pcs", price_per_unit=10)
+                            for name, qty, rp in materials])
+        db.session.commit()
+
+
+def count_loads(monkeypatch):
+    loads = []
+    load = Catalog._load
+    monkeypatch.setattr(Catalog, '_load', lambda self: (loads.append(1), load(self))[1])
+    return loads
+
+
+def test_own_checkout_does_not_reload_catalog(app, monkeypatch):
+    add_materials(app, ("Cement", 100, 10))
+    client = app.test_client()
+    client.get('/')
+    loads = count_loads(monkeypatch)
+
+    for _ in range(5):
+        assert client.post('/checkout', json={"items": [{"material_id": 1, "qty": 2}]}).status_code == 200
+        client.get('/')
+
+    assert loads == []
+    with app.app_context():
+        assert get_catalog().get(1).quantity == 90
+
+
+def test_commit_after_checkout_still_reloads(app, monkeypatch):
+    add_materials(app, ("Cement", 100, 10), ("Sand", 50, 5))
+    client = app.test_client()
+    client.get('/')
+
+    commit = Catalog._commit
+
+    def commit_after_other_writer(self, pending):
+        # another process commits between our COMMIT and the catalog update
+        other = sqlite3.connect(db.engine.url.database)
+        other.execute("UPDATE material SET quantity = 7 WHERE id = 2")
+        other.commit()
+        other.close()
+        commit(self, pending)
+
+    monkeypatch.setattr(Catalog, '_commit', commit_after_other_writer)
+    with app.app_context():
+        assert client.post('/checkout', json={"items": [{"material_id": 1, "qty": 1}]}).status_code == 200
+        assert get_catalog().get(1).quantity == 99
+        assert get_catalog().get(2).quantity == 7
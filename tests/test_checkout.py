@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+import app as app_module
+from catalog import Catalog
+from models import db, Material, Sale
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        db.session.add_all([Material(name="Cement", quantity=100, reorder_point=10, unit="bags", price_per_unit=5),
+                            Material(name="Sand", quantity=50, reorder_point=5, unit="m3", price_per_unit=20)])
+        db.session.commit()
+    return app.test_client()
+
+
+def stock(app):
+    with app.app_context():
+        return {m.name: m.quantity for m in Material.query.all()}
+
+
+def sale_keys(app):
+    with app.app_context():
+        return sorted(key for key, in db.session.query(Sale.client_key))
+
+
+def cart(key, *items):
+    return {"client_key": key, "timestamp": "2024-05-01T08:00:00Z",
+            "items": [{"material_id": mid, "qty": qty} for mid, qty in items]}
+
+
+def test_batch_bad_cart_only_rolls_back_itself(app, client):
+    carts = [cart("a", (1, 10)),
+             {"client_key": "b", "items": ["x"]},
+             cart("c", (1, 5), (2, 500)),
+             cart("d", (2, 3))]
+    res = client.post('/checkout/batch', json={"carts": carts})
+
+    assert res.status_code == 200
+    assert [r["status"] for r in res.get_json()["results"]] == ["applied", "error", "error", "applied"]
+    assert sale_keys(app) == ["a", "d"]
+    assert stock(app) == {"Cement": 90, "Sand": 47}
+
+
+def test_batch_is_one_transaction(app, client, monkeypatch):
+    def fail(self, session, quantities):
+        raise RuntimeError("disk full")
+
+    # fails after every cart has been applied, just before the commit
+    monkeypatch.setattr(Catalog, 'track', fail)
+    res = client.post('/checkout/batch', json={"carts": [cart("a", (1, 10)), cart("b", (2, 3))]})
+
+    assert res.status_code == 500
+    assert sale_keys(app) == []
+    assert stock(app) == {"Cement": 100, "Sand": 50}
+
+
+def test_batch_skips_recorded_keys(app, client):
+    client.post('/checkout/batch', json={"carts": [cart("a", (1, 10))]})
+    res = client.post('/checkout/batch', json={"carts": [cart("a", (1, 10)), cart("b", (1, 1))]})
+
+    assert [r["status"] for r in res.get_json()["results"]] == ["duplicate", "applied"]
+    assert stock(app) == {"Cement": 89, "Sand": 50}
+
+
+@pytest.mark.parametrize("qty", [-100, 0, "nan"])
+def test_checkout_rejects_non_positive_quantity(app, client, qty):
+    res = client.post('/checkout', json={"items": [{"material_id": 1, "qty": qty}]})
+
+    assert res.status_code == 400
+    assert "must be positive" in res.get_json()["error"]
+    assert stock(app) == {"Cement": 100, "Sand": 50}
+    assert sale_keys(app) == []
+
+
+def test_checkout_retry_racing_on_client_key(app, client, monkeypatch):
+    apply_cart = app_module.apply_cart
+
+    def record_twin_first(items, changes, **kwargs):
+        # the identical retry commits between our key check and our insert
+        other = sqlite3.connect(db.engine.url.database)
+        other.execute("INSERT INTO sale (date, total, client_key) VALUES ('2024-05-01', 5, 'k1')")
+        other.commit()
+        other.close()
+        return apply_cart(items, changes, **kwargs)
+
+    monkeypatch.setattr(app_module, 'apply_cart', record_twin_first)
+    res = client.post('/checkout', json={"client_key": "k1", "items": [{"material_id": 1, "qty": 1}]})
+
+    assert res.status_code == 200
+    assert res.get_json()["message"] == "Already recorded"
+    assert sale_keys(app) == ["k1"]
+    assert stock(app) == {"Cement": 100, "Sand": 50}
@@ -0,0 +1,25 @@
+from models import db, Material
+
+
+def add_materials(app, *materials):
+    with app.app_context():
+        db.session.add_all([Material(name=name, quantity=qty, reorder_point=rp, unit="pcs")
+                            for name, qty, rp in materials])
+        db.session.commit()
+
+
+def test_notifications_with_no_low_stock(app):
+    add_materials(app, ("Cement", 100, 10))
+    res = app.test_client().get('/notifications')
+    assert res.status_code == 200
+    assert b"All materials are sufficiently stocked" in res.data
+
+
+def test_notifications_lists_every_low_material(app):
+    add_materials(app, ("Beta", 1, 10), ("Alpha", 2, 10), ("Gamma", 3, 10), ("Plenty", 500, 10))
+    res = app.test_client().get('/notifications')
+    assert res.status_code == 200
+    body = res.get_data(as_text=True)
+    assert "Alpha" in body and "Beta" in body and "Gamma" in body
+    assert "Plenty" not in body
+    assert body.index("Alpha") < body.index("Beta") < body.index("Gamma")
@@ -0,0 +1,92 @@
+import io
+
+import pytest
+
+from models import db, Material, UsageLog
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        db.session.add_all([Material(name="Cement", quantity=100, reorder_point=10, unit="bags", price_per_unit=5),
+                            Material(name="Sand", quantity=50, reorder_point=5, unit="m3", price_per_unit=20),
+                            Material(name="Rebar", quantity=30, reorder_point=5, unit="pcs", price_per_unit=8)])
+        db.session.commit()
+    return app.test_client()
+
+
+def stock(app):
+    with app.app_context():
+        return {m.name: m.quantity for m in Material.query.all()}
+
+
+def adjustments(app):
+    with app.app_context():
+        return sorted((log.material_id, log.used_quantity)
+                      for log in UsageLog.query.filter_by(kind='adjustment'))
+
+
+def test_form_preview_changes_nothing(app, client):
+    res = client.post('/stocktake', data={"count-1": "97", "count-2": "", "action": "preview"})
+
+    assert res.status_code == 200
+    assert b"-3" in res.data
+    assert stock(app) == {"Cement": 100, "Sand": 50, "Rebar": 30}
+    assert adjustments(app) == []
+
+
+def test_form_apply(app, client):
+    res = client.post('/stocktake', data={"count-1": "97", "count-2": "50", "action": "apply"})
+
+    assert res.status_code == 200
+    assert stock(app) == {"Cement": 97, "Sand": 50, "Rebar": 30}
+    assert adjustments(app) == [(1, 3)]
+
+
+def test_csv_apply_by_name_and_id(app, client):
+    sheet = io.BytesIO(b"material_id,name,counted\n,Sand,52\n3,,25\n")
+    res = client.post('/stocktake', data={"sheet": (sheet, "count.csv"), "action": "apply"},
+                      content_type="multipart/form-data")
+
+    assert res.status_code == 200
+    assert stock(app) == {"Cement": 100, "Sand": 52, "Rebar": 25}
+    assert adjustments(app) == [(2, -2), (3, 5)]
+
+
+def test_json_preview_and_apply(app, client):
+    counts = [{"material_id": 1, "counted": 95}, {"name": "Sand", "counted": 50}]
+
+    res = client.post('/stocktake', json={"counts": counts, "preview": True})
+    body = res.get_json()
+    assert body["applied"] is False and body["adjusted"] == 1
+    assert stock(app)["Cement"] == 100
+
+    res = client.post('/stocktake', json={"counts": counts})
+    body = res.get_json()
+    assert body["applied"] is True
+    assert [(r["name"], r["variance"]) for r in body["results"]] == [("Cement", -5), ("Sand", 0)]
+    assert stock(app) == {"Cement": 95, "Sand": 50, "Rebar": 30}
+    assert adjustments(app) == [(1, 5)]
+
+
+@pytest.mark.parametrize("counts, error", [
+    ([{"material_id": 1, "counted": 90}, {"material_id": 99, "counted": 1}], "Material ID 99 not found"),
+    ([{"material_id": 1, "counted": 90}, {"material_id": 2, "counted": -1}], "Row 2: count cannot be negative"),
+    ([{"material_id": 1, "counted": 90}, {"material_id": 1, "counted": 80}], "Row 2: material ID 1 already counted in row 1"),
+    ([{"material_id": 1, "counted": 90}, {"name": "Cement", "counted": 80}], 'Row 2: "Cement" already counted in row 1'),
+])
+def test_invalid_sheet_applies_nothing(app, client, counts, error):
+    res = client.post('/stocktake', json={"counts": counts})
+
+    assert res.status_code == 400
+    assert error in res.get_json()["errors"]
+    assert stock(app) == {"Cement": 100, "Sand": 50, "Rebar": 30}
+    assert adjustments(app) == []
+
+
+def test_invalid_form_applies_nothing(app, client):
+    res = client.post('/stocktake', data={"count-1": "90", "count-2": "lots", "action": "apply"})
+
+    assert res.status_code == 200
+    assert b"Row 2" in res.data
+    assert stock(app) == {"Cement": 100, "Sand": 50, "Rebar": 30}
@@ -1,20 +1,23 @@
-from datetime import datetime
-from models import Material, UsageLog
+from datetime import datetime, timedelta
+from models import db, Material, UsageLog, ReorderRequest
 from sklearn.linear_model import LinearRegression
 import numpy as np
 
 
-def get_low_stock():
+def get_low_stock(session=None):
     """
     Returns materials that are below or equal to their reorder point.
+    Pass `session` to run on a different session (e.g. the reporting one).
     """
-    return Material.query.filter(Material.quantity <= Material.reorder_point).all()
+    session = session or db.session
+    return session.query(Material).filter(Material.quantity <= Material.reorder_point).all()
 
 
-def predict_depletion_days(material):
+def predict_depletion_days(material, session=None):
     """
     Predicts how many days before a material runs out using Linear Regression.
     Uses UsageLog data (date vs. remaining quantity).
+    Pass `session` to run on a different session (e.g. the reporting one).
     Returns:
         float: Estimated days until depletion
         None: If not enough data or stock not decreasing
@@ -22,7 +25,8 @@ def predict_depletion_days(material):
 
     try:
         # Get usage logs for this material (oldest first)
-        usage_logs = UsageLog.query.filter_by(
+        session = session or db.session
+        usage_logs = session.query(UsageLog).filter_by(
             material_id=material.id
         ).order_by(UsageLog.date).all()
 
@@ -68,3 +72,88 @@ def predict_depletion_days(material):
         print(
             f"⚠️ Error in predict_depletion_days for material '{material.name}': {e}")
         return None
+
+
+def simulate_stockout(horizons=(7, 14, 30), n_sims=2000, service_level=0.95,
+                      lead_time_days=7, history_days=90, session=None, seed=None):
+    """
+    Monte Carlo stock-out simulation for every material at once.
+    Daily demand is bootstrapped from UsageLog history (days without logs
+    count as zero demand; stocktake adjustments are not demand) and
+    `n_sims` stock trajectories are run per material as NumPy arrays.
+    Open (Pending / Ordered) ReorderRequest quantities are assumed to
+    arrive after `lead_time_days`.
+    Returns:
+        dict: material_id -> {
+            "stockout_prob": {horizon: probability of hitting zero by that day},
+            "reorder_point": lead-time demand covered at `service_level`
+        }
+    """
+    if lead_time_days < 1:
+        raise ValueError('lead_time_days must be at least 1')
+    session = session or db.session
+    horizon_days = max(max(horizons), lead_time_days)
+
+    materials = session.query(Material.id, Material.quantity).order_by(Material.id).all()
+    if not materials:
+        return {}
+    ids = np.array([m.id for m in materials])
+    stock = np.array([m.quantity or 0.0 for m in materials], dtype=float)
+    row = {mid: i for i, mid in enumerate(ids.tolist())}
+
+    pending = np.zeros(len(ids))
+    open_reorders = session.query(
+        ReorderRequest.material_id, db.func.sum(ReorderRequest.requested_qty)
+    ).filter(ReorderRequest.status.in_(['Pending', 'Ordered'])).group_by(ReorderRequest.material_id).all()
+    for material_id, qty in open_reorders:
+        if material_id in row:
+            pending[row[material_id]] = qty or 0.0
+
+    # daily demand matrix, right-aligned so the last column is today
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=history_days - 1)
+    demand = np.zeros((len(ids), history_days))
+    first_day = np.full(len(ids), history_days - 1)
+    logs = session.query(UsageLog.material_id, UsageLog.date, UsageLog.used_quantity).filter(
+        UsageLog.date >= datetime.combine(start, datetime.min.time()),
+        UsageLog.kind == 'usage').all()
+    if logs:
+        rows = np.array([row.get(l.material_id, -1) for l in logs])
+        days = np.array([(l.date.date() - start).days for l in logs])
+        qty = np.array([l.used_quantity or 0.0 for l in logs])
+        keep = (rows >= 0) & (days < history_days)
+        rows, days, qty = rows[keep], days[keep], qty[keep]
+        np.add.at(demand, (rows, days), qty)
+        np.minimum.at(first_day, rows, days)
+    # only sample from the days since a material's first recorded usage
+    history_len = history_days - first_day
+
+    rng = np.random.default_rng(seed)
+    arrival = (np.arange(1, horizon_days + 1) >= lead_time_days)
+    check = np.array(horizons) - 1
+    prob = np.empty((len(ids), len(horizons)))
+    reorder_point = np.empty(len(ids))
+
+    # chunk materials to keep the (materials, sims, days) cube small
+    chunk = max(1, 4_000_000 // (n_sims * horizon_days))
+    for lo in range(0, len(ids), chunk):
+        hi = min(lo + chunk, len(ids))
+        offsets = np.floor(rng.random((hi - lo, n_sims, horizon_days))
+                           * history_len[lo:hi, None, None]).astype(int)
+        sampled = np.take_along_axis(
+            demand[lo:hi], (history_days - 1 - offsets).reshape(hi - lo, -1), axis=1
+        ).reshape(hi - lo, n_sims, horizon_days)
+        cumulative = np.cumsum(sampled, axis=2)
+
+        level = (stock[lo:hi, None, None] + pending[lo:hi, None, None] * arrival) - cumulative
+        stocked_out = np.logical_or.accumulate(level <= 0, axis=2)
+        prob[lo:hi] = stocked_out[:, :, check].mean(axis=1)
+        reorder_point[lo:hi] = np.quantile(cumulative[:, :, lead_time_days - 1], service_level, axis=1)
+
+    return {
+        int(mid): {
+            "stockout_prob": {h: round(float(p), 4) for h, p in zip(horizons, prob[i])},
+            "reorder_point": round(float(reorder_point[i]), 2),
+        }
+        for i, mid in enumerate(ids)
+    }